@@ -1,9 +1,12 @@
+import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
 import numpy as np
 from pathlib import Path
 from itertools import product
+from benchmark_quality import JSON_REPORT_SUFFIXES, assess_quality, collect_rerun_entries, find_json_report, load_json_statistics, print_rerun_list
+from chart_watch import watch
 
 # Configuration
 LIBRARY_COLORS = {
@@ -24,6 +27,16 @@ def adjust_color_lightness(hex_color, factor):
     r, g, b = colorsys.hls_to_rgb(h, l, s)
     return mcolors.rgb2hex((r, g, b))
 
+def blend_colors(hex_color, other_color, factor):
+    """Blend two colors. factor 0 returns hex_color, 1 returns other_color."""
+    rgb = np.array(mcolors.hex2color(hex_color))
+    other = np.array(mcolors.hex2color(other_color))
+    return mcolors.rgb2hex(rgb + (other - rgb) * factor)
+
+# Bars with quality issues are blended towards this color and marked
+UNSTABLE_COLOR = '#95A5A6'
+UNSTABLE_MARKER = '⚠'
+
 CPU_SUBTITLES = {
     'AVX2': 'AMD Ryzen 7 3700X',
     'ARM': 'Apple M4 Max 16c',
@@ -80,6 +93,18 @@ BENCHMARK_CONFIGS = [
     },
 ]
 
+def parse_number(val, divisor=1):
+    """Parse a numeric CSV value and divide it by divisor, missing or non-numeric values become NaN"""
+    if pd.isna(val) or val == 'NA':
+        return np.nan
+    try:
+        # Handle quoted values with thousand separators (e.g., "24,387.6")
+        if isinstance(val, str):
+            val = val.replace(',', '').strip('"')
+        return float(val) / divisor
+    except (ValueError, TypeError):
+        return np.nan
+
 def parse_benchmark_results(filepath, param_columns):
     """Parse CSV from BenchmarkDotNet results"""
     # Read CSV file
@@ -114,8 +139,12 @@ def parse_benchmark_results(filepath, param_columns):
         alloc_col = 'Allocated [B]'
         alloc_divisor = 1024 * 1024  # B to MB
     
+    # StdDev uses the same unit as Mean; Ratio columns only exist when a baseline is set
+    stddev_col = time_col.replace('Mean', 'StdDev')
+    stat_cols = [col for col in [stddev_col, 'Ratio', 'RatioSD', 'MaxIterationCount'] if col in df.columns]
+    
     # Select only the columns we need
-    columns_to_select = ['Method', time_col] + list(param_columns)
+    columns_to_select = ['Method', time_col] + list(param_columns) + stat_cols
     if alloc_col:
         columns_to_select.append(alloc_col)
     df = df[columns_to_select].copy()
@@ -128,32 +157,19 @@ def parse_benchmark_results(filepath, param_columns):
         df[col] = df[col].astype(str)
     
     # Parse mean time (convert to seconds)
-    def parse_time(time_val):
-        if pd.isna(time_val) or time_val == 'NA':
-            return np.nan
-        try:
-            # Handle quoted values with thousand separators (e.g., "24,387.6")
-            if isinstance(time_val, str):
-                time_val = time_val.replace(',', '').strip('"')
-            return float(time_val) / time_divisor
-        except (ValueError, TypeError):
-            return np.nan
+    df['MeanSeconds'] = df[time_col].apply(parse_number, divisor=time_divisor)
     
-    df['MeanSeconds'] = df[time_col].apply(parse_time)
+    # Parse statistics used by the quality checks
+    if stddev_col in df.columns:
+        df['CV'] = df[stddev_col].apply(parse_number, divisor=time_divisor) / df['MeanSeconds']
+    else:
+        df['CV'] = np.nan
+    for col in ['Ratio', 'RatioSD', 'MaxIterationCount']:
+        df[col] = df[col].apply(parse_number) if col in df.columns else np.nan
     
     # Parse allocated memory (convert to MB)
-    def parse_alloc(alloc_val):
-        if pd.isna(alloc_val) or alloc_val == 'NA':
-            return np.nan
-        try:
-            if isinstance(alloc_val, str):
-                alloc_val = alloc_val.replace(',', '').strip('"')
-            return float(alloc_val) / alloc_divisor
-        except (ValueError, TypeError):
-            return np.nan
-    
     if alloc_col:
-        df['AllocatedMB'] = df[alloc_col].apply(parse_alloc)
+        df['AllocatedMB'] = df[alloc_col].apply(parse_number, divisor=alloc_divisor)
     else:
         df['AllocatedMB'] = np.nan
     
@@ -217,7 +233,7 @@ def create_throughput_chart(df, param_filters, output_file, throughput_value=100
     ax.set_facecolor(bg_color)
 
     # Build y-positions and labels, inserting separator if needed
-    bar_data = []  # (display_name, throughput, color, hatch, is_separator)
+    bar_data = []  # (display_name, throughput, color, hatch, is_separator, alloc_mb, is_unstable)
 
     # Track where to insert separator
     separator_inserted = False
@@ -226,7 +242,7 @@ def create_throughput_chart(df, param_filters, output_file, throughput_value=100
     for i, (idx, row) in enumerate(filtered.iterrows()):
         # Insert separator between parallel and non-parallel groups
         if has_parallel and has_non_parallel and not separator_inserted and i == parallel_count:
-            bar_data.append(('', 0, 'none', None, True, np.nan))  # separator
+            bar_data.append(('', 0, 'none', None, True, np.nan, False))  # separator
             separator_inserted = True
 
         method = row['Method']
@@ -272,14 +288,19 @@ def create_throughput_chart(df, param_filters, output_file, throughput_value=100
         if is_parallel:
             hatch = 'oo'
 
+        # Grey out results flagged by the quality checks
+        is_unstable = bool(row.get('QualityIssues'))
+        if is_unstable:
+            color = blend_colors(color, UNSTABLE_COLOR, 0.6)
+
         alloc_mb = row.get('AllocatedMB', np.nan)
-        bar_data.append((display_name, row['Throughput'], color, hatch, False, alloc_mb))
+        bar_data.append((display_name, row['Throughput'], color, hatch, False, alloc_mb, is_unstable))
 
     # Create bars from bar_data
     bars = []
     labels = []
     separator_y = None
-    for i, (display_name, throughput, color, hatch, is_separator, alloc_mb) in enumerate(bar_data):
+    for i, (display_name, throughput, color, hatch, is_separator, alloc_mb, is_unstable) in enumerate(bar_data):
         if is_separator:
             # Add empty space for separator
             labels.append('')
@@ -288,7 +309,8 @@ def create_throughput_chart(df, param_filters, output_file, throughput_value=100
         else:
             labels.append(display_name)
             bar = ax.barh(i, throughput, 
-                          color=color, hatch=hatch, edgecolor=edge_color, linewidth=1)
+                          color=color, hatch=hatch, edgecolor=edge_color, linewidth=1,
+                          alpha=0.6 if is_unstable else 1.0)
         bars.append(bar)
 
     # Add horizontal line at separator position
@@ -324,20 +346,28 @@ def create_throughput_chart(df, param_filters, output_file, throughput_value=100
         spine.set_color(text_color)
 
     # Get max throughput for positioning
-    max_throughput = max(t for _, t, _, _, is_sep, _ in bar_data if not is_sep)
+    max_throughput = max(t for _, t, _, _, is_sep, _, _ in bar_data if not is_sep)
 
-    # Add value labels (throughput right after bar)
-    for i, (display_name, throughput, color, hatch, is_separator, alloc_mb) in enumerate(bar_data):
+    # Add value labels (throughput right after bar), marking unstable results
+    for i, (display_name, throughput, color, hatch, is_separator, alloc_mb, is_unstable) in enumerate(bar_data):
         if not is_separator:
-            ax.text(throughput, i, f" {throughput:.{decimal_places}f}", 
-                    va='center', fontsize=10, fontweight='bold', color=text_color)
+            marker = f" {UNSTABLE_MARKER}" if is_unstable else ''
+            ax.text(throughput, i, f" {throughput:.{decimal_places}f}{marker}", 
+                    va='center', fontsize=10, fontweight='bold', color=text_color,
+                    alpha=0.6 if is_unstable else 1.0)
+
+    if any(is_unstable for *_, is_unstable in bar_data):
+        ax.annotate(f"{UNSTABLE_MARKER} Unstable measurement, re-run recommended",
+                    xy=(0, 0), xycoords='axes fraction', xytext=(0, -45), textcoords='offset points',
+                    va='top', ha='left', fontsize=9, fontstyle='italic', color=text_color, alpha=0.8,
+                    annotation_clip=False)
 
     # Add memory labels outside the chart on the right
     # Use axes transform to place text at fixed position relative to axes
-    alloc_values = [alloc_mb for _, _, _, _, is_sep, alloc_mb in bar_data if not is_sep and not pd.isna(alloc_mb)]
+    alloc_values = [alloc_mb for _, _, _, _, is_sep, alloc_mb, _ in bar_data if not is_sep and not pd.isna(alloc_mb)]
     min_alloc = min(alloc_values) if alloc_values else None
 
-    for i, (display_name, throughput, color, hatch, is_separator, alloc_mb) in enumerate(bar_data):
+    for i, (display_name, throughput, color, hatch, is_separator, alloc_mb, is_unstable) in enumerate(bar_data):
         if not is_separator and not pd.isna(alloc_mb):
             if alloc_mb >= 1:
                 mem_str = f"{alloc_mb:.1f} MB"
@@ -357,118 +387,180 @@ def create_throughput_chart(df, param_filters, output_file, throughput_value=100
                        bbox=dict(boxstyle='round,pad=0.25', facecolor=highlight_bg, edgecolor='none'),
                        annotation_clip=False)
 
-    plt.tight_layout()
-    plt.savefig(output_file, dpi=300, bbox_inches='tight', facecolor=fig_facecolor)
-    plt.close()
+    # fig.savefig skips the redraw plt.savefig does afterwards
+    fig.tight_layout()
+    fig.savefig(output_file, dpi=300, bbox_inches='tight', facecolor=fig_facecolor)
+    plt.close(fig)
     print(f"Saved: {output_file}")
 
+def load_chart_tasks(benchmark_dir, config, rerun_entries=None):
+    """Parse one benchmark report and return the (function, args, kwargs) tasks that render its charts
+
+    Flagged results are appended to rerun_entries when given.
+    """
+    filepath = f"{benchmark_dir}/{config['filepath']}"
+    title = config['title']
+    throughput_value_config = config['throughput_value']
+    throughput_unit = config['throughput_unit']
+    throughput_divisor = config.get('throughput_divisor', 1)  # Default to 1 (no scaling)
+    decimal_places = config.get('decimal_places', 1)  # Default to 1 decimal place
+    parameters = config['parameters']
+    
+    # Check if file exists
+    if not Path(filepath).exists():
+        print(f"  Skipping {filepath} (file not found)")
+        return []
+    
+    # Determine subtitle based on folder
+    subtitle = CPU_SUBTITLES.get(benchmark_dir)
+    
+    # Parse results from the benchmark file
+    df = parse_benchmark_results(filepath, list(parameters.keys()))
+
+    # Exclude Sep hardcoded variants from ReadObjects charts
+    if config["filepath"].endswith("ReadObjects-report.csv"):
+        sep_hardcoded = df['Method'].str.contains('Sep', regex=False) & df['Method'].str.contains('Hardcoded', regex=False)
+        df = df[~sep_hardcoded]
+    
+    # Flag noisy results using the CSV statistics and the per-iteration values from the JSON report
+    json_path = find_json_report(filepath)
+    json_stats = load_json_statistics(json_path, list(parameters.keys())) if json_path else None
+    df = assess_quality(df, list(parameters.keys()), json_stats)
+    if rerun_entries is not None:
+        benchmark_type = config['filepath'].removesuffix('-report.csv').rsplit('.', 1)[-1]
+        rerun_entries += collect_rerun_entries(df, benchmark_type, list(parameters.keys()), benchmark_dir)
+    
+    # Always load memory data from Neon (has complete data)
+    neon_filepath = f"Neon/{config['filepath']}"
+    if Path(neon_filepath).exists() and benchmark_dir != 'Neon':
+        neon_df = parse_benchmark_results(neon_filepath, list(parameters.keys()))
+        if config["filepath"].endswith("ReadObjects-report.csv"):
+            sep_hardcoded_neon = neon_df['Method'].str.contains('Sep', regex=False) & neon_df['Method'].str.contains('Hardcoded', regex=False)
+            neon_df = neon_df[~sep_hardcoded_neon]
+        # Merge memory data from Neon into main df
+        # Create a key from Method + parameters for matching
+        param_cols = list(parameters.keys())
+        merge_cols = ['Method'] + param_cols
+        
+        # Normalize method names for matching (handle naming differences between datasets)
+        def normalize_method(m):
+            # _FlameCsv_Reflection -> _FlameCsv, _FlameCsv -> _FlameCsv
+            # But keep _Flame_SrcGen, _FlameCsv_SrcGen_Parallel etc.
+            if m == 'FlameCsv_Reflection':
+                return 'FlameCsv'
+            return m
+        
+        if 'AllocatedMB' in neon_df.columns:
+            memory_data = neon_df[merge_cols + ['AllocatedMB']].copy()
+            # Add normalized method column for matching
+            df['_norm_method'] = df['Method'].apply(normalize_method)
+            memory_data['_norm_method'] = memory_data['Method'].apply(normalize_method)
+            
+            # Merge on normalized method + params
+            norm_merge_cols = ['_norm_method'] + param_cols
+            memory_data = memory_data.drop(columns=['Method']).rename(columns={'_norm_method': '_norm_method'})
+            df = df.drop(columns=['AllocatedMB'], errors='ignore')
+            df = df.merge(memory_data[norm_merge_cols + ['AllocatedMB']], on=norm_merge_cols, how='left')
+            df = df.drop(columns=['_norm_method'])
+    
+    # Generate all combinations of parameter values
+    param_names = list(parameters.keys())
+    param_value_lists = [list(parameters[name].keys()) for name in param_names]
+    
+    tasks = []
+    for param_values in product(*param_value_lists):
+        # Build param_filters dict: {column: (value, display_name)}
+        param_filters = {}
+        for name, value in zip(param_names, param_values):
+            param_filters[name] = (value, parameters[name][value])
+        
+        # Resolve throughput_value (can be a number or a dict keyed by parameter values)
+        if isinstance(throughput_value_config, dict):
+            # Find the first matching parameter key
+            throughput_value = None
+            for param_name, param_val in zip(param_names, param_values):
+                if param_name in throughput_value_config:
+                    throughput_value = throughput_value_config[param_name][param_val]
+                    break
+            if throughput_value is None:
+                raise ValueError(f"Could not resolve throughput_value for {param_filters}")
+        else:
+            throughput_value = throughput_value_config
+        
+        # Build filename suffix from display names (lowercase, underscores)
+        suffix_parts = [parameters[name][value].lower().replace(' ', '_') 
+                       for name, value in zip(param_names, param_values)]
+        suffix = '_'.join(suffix_parts)
+        
+        # Generate base filename from benchmark title
+        base_name = title.lower().replace(' ', '_')
+        
+        # Use the same folder as the input CSV for output
+        input_path = Path(filepath)
+        output_dir = input_path.parent
+        
+        # Light and dark mode versions
+        for mode in ['light', 'dark']:
+            output_file = output_dir / f'{base_name}_{suffix}_{mode}.svg'
+            tasks.append((create_throughput_chart,
+                          (df, param_filters, output_file, throughput_value, throughput_unit, throughput_divisor, decimal_places),
+                          dict(mode=mode, subtitle=subtitle, title=title)))
+    return tasks
+
+def chart_sources(benchmark_dir, config):
+    """Files the charts of one benchmark config in one directory are derived from"""
+    filepath = Path(benchmark_dir) / config['filepath']
+    base_name = config['filepath'].removesuffix('-report.csv')
+    sources = [filepath] + [filepath.with_name(base_name + suffix) for suffix in JSON_REPORT_SUFFIXES]
+    # Memory data is merged in from Neon
+    if benchmark_dir != 'Neon':
+        sources.append(Path('Neon') / config['filepath'])
+    return sources
+
+def watch_targets():
+    """Watch targets for chart_watch.watch(), re-rendering a config's charts when any of its sources change
+
+    Also returns a callback that prints one combined re-run list for the configs reloaded in a batch.
+    """
+    batch = []  # re-run entries of each config reloaded since the last callback
+
+    def loader(benchmark_dir, config):
+        def load():
+            rerun_entries = []
+            batch.append(rerun_entries)
+            return load_chart_tasks(benchmark_dir, config, rerun_entries)
+        return load
+
+    def print_batch_rerun_list():
+        if batch:
+            print_rerun_list([entry for entries in batch for entry in entries])
+            batch.clear()
+
+    targets = [(chart_sources(benchmark_dir, config), loader(benchmark_dir, config))
+               for benchmark_dir in BENCHMARK_DIRS for config in BENCHMARK_CONFIGS]
+    return targets, print_batch_rerun_list
+
 def main():
+    parser = argparse.ArgumentParser(description='Generate throughput charts from BenchmarkDotNet reports')
+    parser.add_argument('--watch', action='store_true',
+                        help='keep running and re-render the charts of reports as they change')
+    args = parser.parse_args()
+
+    if args.watch:
+        targets, print_batch_rerun_list = watch_targets()
+        watch(targets, [print_batch_rerun_list])
+        return
+
+    rerun_entries = []
+
     for benchmark_dir in BENCHMARK_DIRS:
         print(f"\nProcessing {benchmark_dir}...")
         
         for config in BENCHMARK_CONFIGS:
-            filepath = f"{benchmark_dir}/{config['filepath']}"
-            title = config['title']
-            throughput_value_config = config['throughput_value']
-            throughput_unit = config['throughput_unit']
-            throughput_divisor = config.get('throughput_divisor', 1)  # Default to 1 (no scaling)
-            decimal_places = config.get('decimal_places', 1)  # Default to 1 decimal place
-            parameters = config['parameters']
-            
-            # Check if file exists
-            if not Path(filepath).exists():
-                print(f"  Skipping {filepath} (file not found)")
-                continue
-            
-            # Determine subtitle based on folder
-            subtitle = CPU_SUBTITLES.get(benchmark_dir)
-            
-            # Parse results from the benchmark file
-            df = parse_benchmark_results(filepath, list(parameters.keys()))
-
-            # Exclude Sep hardcoded variants from ReadObjects charts
-            if config["filepath"].endswith("ReadObjects-report.csv"):
-                sep_hardcoded = df['Method'].str.contains('Sep', regex=False) & df['Method'].str.contains('Hardcoded', regex=False)
-                df = df[~sep_hardcoded]
-            
-            # Always load memory data from Neon (has complete data)
-            neon_filepath = f"Neon/{config['filepath']}"
-            if Path(neon_filepath).exists() and benchmark_dir != 'Neon':
-                neon_df = parse_benchmark_results(neon_filepath, list(parameters.keys()))
-                if config["filepath"].endswith("ReadObjects-report.csv"):
-                    sep_hardcoded_neon = neon_df['Method'].str.contains('Sep', regex=False) & neon_df['Method'].str.contains('Hardcoded', regex=False)
-                    neon_df = neon_df[~sep_hardcoded_neon]
-                # Merge memory data from Neon into main df
-                # Create a key from Method + parameters for matching
-                param_cols = list(parameters.keys())
-                merge_cols = ['Method'] + param_cols
-                
-                # Normalize method names for matching (handle naming differences between datasets)
-                def normalize_method(m):
-                    # _FlameCsv_Reflection -> _FlameCsv, _FlameCsv -> _FlameCsv
-                    # But keep _Flame_SrcGen, _FlameCsv_SrcGen_Parallel etc.
-                    if m == 'FlameCsv_Reflection':
-                        return 'FlameCsv'
-                    return m
-                
-                if 'AllocatedMB' in neon_df.columns:
-                    memory_data = neon_df[merge_cols + ['AllocatedMB']].copy()
-                    # Add normalized method column for matching
-                    df['_norm_method'] = df['Method'].apply(normalize_method)
-                    memory_data['_norm_method'] = memory_data['Method'].apply(normalize_method)
-                    
-                    # Merge on normalized method + params
-                    norm_merge_cols = ['_norm_method'] + param_cols
-                    memory_data = memory_data.drop(columns=['Method']).rename(columns={'_norm_method': '_norm_method'})
-                    df = df.drop(columns=['AllocatedMB'], errors='ignore')
-                    df = df.merge(memory_data[norm_merge_cols + ['AllocatedMB']], on=norm_merge_cols, how='left')
-                    df = df.drop(columns=['_norm_method'])
-            
-            # Generate all combinations of parameter values
-            param_names = list(parameters.keys())
-            param_value_lists = [list(parameters[name].keys()) for name in param_names]
-            
-            for param_values in product(*param_value_lists):
-                # Build param_filters dict: {column: (value, display_name)}
-                param_filters = {}
-                for name, value in zip(param_names, param_values):
-                    param_filters[name] = (value, parameters[name][value])
-                
-                # Resolve throughput_value (can be a number or a dict keyed by parameter values)
-                if isinstance(throughput_value_config, dict):
-                    # Find the first matching parameter key
-                    throughput_value = None
-                    for param_name, param_val in zip(param_names, param_values):
-                        if param_name in throughput_value_config:
-                            throughput_value = throughput_value_config[param_name][param_val]
-                            break
-                    if throughput_value is None:
-                        raise ValueError(f"Could not resolve throughput_value for {param_filters}")
-                else:
-                    throughput_value = throughput_value_config
-                
-                # Build filename suffix from display names (lowercase, underscores)
-                suffix_parts = [parameters[name][value].lower().replace(' ', '_') 
-                               for name, value in zip(param_names, param_values)]
-                suffix = '_'.join(suffix_parts)
-                
-                # Generate base filename from benchmark title
-                base_name = title.lower().replace(' ', '_')
-                
-                # Use the same folder as the input CSV for output
-                input_path = Path(filepath)
-                output_dir = input_path.parent
-                
-                # Light mode version
-                output_file_light = output_dir / f'{base_name}_{suffix}_light.svg'
-                create_throughput_chart(df, param_filters, output_file_light, throughput_value, 
-                                       throughput_unit, throughput_divisor, decimal_places, mode='light', subtitle=subtitle, title=title)
-                
-                # Dark mode version
-                output_file_dark = output_dir / f'{base_name}_{suffix}_dark.svg'
-                create_throughput_chart(df, param_filters, output_file_dark, throughput_value, 
-                                       throughput_unit, throughput_divisor, decimal_places, mode='dark', subtitle=subtitle, title=title)
+            for func, func_args, func_kwargs in load_chart_tasks(benchmark_dir, config, rerun_entries):
+                func(*func_args, **func_kwargs)
     
+    print_rerun_list(rerun_entries)
     print("\nAll charts generated successfully!")
 
 if __name__ == '__main__':
@@ -0,0 +1,206 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Thresholds used to flag unstable results
+CV_THRESHOLD = 0.03  # StdDev / Mean
+# RatioSD / Ratio. The CSV rounds both to 2 decimals, so the check is skipped below RATIO_SD_MIN_RATIO
+# where the rounding alone can exceed the threshold (e.g. 0.10 ± 0.01)
+RATIO_SD_THRESHOLD = 0.05
+RATIO_SD_MIN_RATIO = 0.2
+DRIFT_T_THRESHOLD = 4.0  # Welch's t between the first and last third of the iterations
+DRIFT_THRESHOLD = 0.02  # Smallest drift worth flagging, relative to the mean
+BIMODALITY_THRESHOLD = 0.555  # Bimodality coefficient of a uniform distribution
+BIMODAL_MIN_SEPARATION = 0.04  # Distance between the two sample clusters, relative to the mean
+BIMODAL_MIN_SHARE = 0.2  # The smaller cluster must contain at least this fraction of the samples
+MIN_SAMPLES = 12  # Don't attempt distribution checks on fewer samples than this
+
+# BenchmarkDotNet's MaxIterationCount when the job doesn't override it
+DEFAULT_MAX_ITERATION_COUNT = 100
+
+# Brief reports only have N, which excludes the removed upper outliers (up to 3 per run in these
+# results), so runs within this many iterations of MaxIterationCount may have hit it
+MAX_ITERATION_MARGIN = 3
+
+# JSON exporters in order of preference, all of them include Statistics.OriginalValues
+JSON_REPORT_SUFFIXES = [
+    '-report-full-compressed.json',
+    '-report-full.json',
+    '-report-brief-compressed.json',
+    '-report-brief.json',
+]
+
+def find_json_report(csv_path):
+    """Find the JSON report exported alongside a BenchmarkDotNet CSV report, or None"""
+    csv_path = Path(csv_path)
+    base_name = csv_path.name.removesuffix('-report.csv')
+    for suffix in JSON_REPORT_SUFFIXES:
+        json_path = csv_path.with_name(base_name + suffix)
+        if json_path.exists():
+            return json_path
+    return None
+
+def _result_key(method, params, param_columns):
+    """Key used to match JSON benchmarks to CSV rows"""
+    return (method.lstrip('_'),) + tuple(str(params.get(col)) for col in param_columns)
+
+def load_json_statistics(json_path, param_columns):
+    """Load per-iteration measurements from a BenchmarkDotNet JSON report
+
+    Returns a dict of {(method, *param_values): (values, iteration_count, is_exact)}, where values
+    are the iteration times in run order with upper outliers already removed. The iteration count is
+    exact when the report includes Measurements (full reports), otherwise it is N, a lower bound.
+    """
+    with open(json_path, encoding='utf-8') as f:
+        report = json.load(f)
+
+    results = {}
+    for benchmark in report.get('Benchmarks', []):
+        stats = benchmark.get('Statistics')
+        if not stats:
+            continue
+
+        # Parameters are formatted as "Quoted=False&Async=True"
+        params = dict(p.split('=', 1) for p in benchmark.get('Parameters', '').split('&') if '=' in p)
+        values = stats.get('OriginalValues') or []
+        measurements = benchmark.get('Measurements')
+        if measurements:
+            # Count the actual workload iterations of each launch, MaxIterationCount applies per launch
+            launches = {}
+            for m in measurements:
+                if m.get('IterationMode') == 'Workload' and m.get('IterationStage') == 'Actual':
+                    launches[m.get('LaunchIndex')] = launches.get(m.get('LaunchIndex'), 0) + 1
+            iteration_count = max(launches.values(), default=0)
+            is_exact = True
+        else:
+            iteration_count = stats.get('N', len(values))
+            is_exact = False
+        results[_result_key(benchmark['Method'], params, param_columns)] = (values, iteration_count, is_exact)
+    return results
+
+def is_bimodal(values):
+    """Check whether the samples form two distinct clusters
+
+    Uses the sample-size corrected bimodality coefficient (g² + 1) / (k + 3(n-1)² / ((n-2)(n-3)))
+    with bias-corrected skewness g and excess kurtosis k, and requires the best two-way split of the
+    sorted samples to be both well separated and reasonably balanced.
+    """
+    values = np.sort(np.asarray(values, dtype=float))
+    n = len(values)
+    if n < MIN_SAMPLES:
+        return False
+
+    mean = values.mean()
+    std = values.std()
+    if std == 0 or mean == 0:
+        return False
+
+    g1 = np.mean((values - mean) ** 3) / std ** 3
+    g2 = np.mean((values - mean) ** 4) / std ** 4 - 3
+    skewness = g1 * np.sqrt(n * (n - 1)) / (n - 2)
+    excess_kurtosis = ((n + 1) * g2 + 6) * (n - 1) / ((n - 2) * (n - 3))
+    coefficient = (skewness ** 2 + 1) / (excess_kurtosis + 3 * (n - 1) ** 2 / ((n - 2) * (n - 3)))
+    if coefficient <= BIMODALITY_THRESHOLD:
+        return False
+
+    # Split the sorted samples where the within-cluster variance is smallest
+    split = min(range(1, n), key=lambda i: values[:i].var() * i + values[i:].var() * (n - i))
+    separation = (values[split:].mean() - values[:split].mean()) / mean
+    share = min(split, n - split) / n
+    return separation >= BIMODAL_MIN_SEPARATION and share >= BIMODAL_MIN_SHARE
+
+def warmup_drift(values):
+    """Compare the first and last third of the iterations
+
+    Returns (drift, t), the difference of the means relative to the overall mean and Welch's t
+    statistic for it. Both are 0 when there are too few samples.
+    """
+    values = np.asarray(values, dtype=float)
+    third = len(values) // 3
+    if len(values) < MIN_SAMPLES or values.mean() == 0:
+        return 0.0, 0.0
+    first, last = values[:third], values[-third:]
+    difference = last.mean() - first.mean()
+    standard_error = np.sqrt(first.var(ddof=1) / third + last.var(ddof=1) / third)
+    t = difference / standard_error if standard_error > 0 else 0.0
+    return difference / values.mean(), t
+
+def assess_quality(df, param_columns, json_stats=None):
+    """Add a QualityIssues column listing the reasons each result is unstable
+
+    Uses the CV and RatioSD columns from parse_benchmark_results, and the per-iteration values from
+    load_json_statistics when available. Rows without a valid mean get no issues.
+    """
+    json_stats = json_stats or {}
+    issues_column = []
+
+    for _, row in df.iterrows():
+        issues = []
+        if pd.isna(row['MeanSeconds']):
+            issues_column.append(issues)
+            continue
+
+        cv = row.get('CV', np.nan)
+        if not pd.isna(cv) and cv > CV_THRESHOLD:
+            issues.append(f'high CV ({cv:.1%})')
+
+        ratio = row.get('Ratio', np.nan)
+        ratio_sd = row.get('RatioSD', np.nan)
+        if not pd.isna(ratio) and not pd.isna(ratio_sd) and ratio >= RATIO_SD_MIN_RATIO and ratio_sd / ratio > RATIO_SD_THRESHOLD:
+            issues.append(f'high RatioSD ({ratio:.2f} ± {ratio_sd:.2f})')
+
+        key = _result_key(row['Method'], row, param_columns)
+        if key in json_stats:
+            values, iteration_count, is_exact = json_stats[key]
+
+            if is_bimodal(values):
+                issues.append('bimodal samples')
+
+            # Flag drift that is both significant and large enough to matter
+            drift, t = warmup_drift(values)
+            if abs(t) > DRIFT_T_THRESHOLD and abs(drift) > DRIFT_THRESHOLD:
+                issues.append(f'drift across iterations ({drift:+.1%})')
+
+            # The engine stops at MaxIterationCount even if the result hasn't stabilized
+            max_iterations = row.get('MaxIterationCount', np.nan)
+            if pd.isna(max_iterations):
+                max_iterations = DEFAULT_MAX_ITERATION_COUNT
+            if is_exact and iteration_count >= max_iterations:
+                issues.append(f'hit MaxIterationCount ({iteration_count}/{max_iterations:.0f})')
+            elif not is_exact and iteration_count >= max_iterations - MAX_ITERATION_MARGIN:
+                issues.append(f'likely hit MaxIterationCount (N={iteration_count}, max {max_iterations:.0f})')
+
+        issues_column.append(issues)
+
+    df = df.copy()
+    df['QualityIssues'] = issues_column
+    return df
+
+def collect_rerun_entries(df, benchmark_type, param_columns, label):
+    """List (label, filter, parameters, issues) for every flagged result in the dataframe"""
+    entries = []
+    for _, row in df.iterrows():
+        issues = row.get('QualityIssues') or []
+        if not issues:
+            continue
+        params = ', '.join(f'{col}={row[col]}' for col in param_columns)
+        entries.append((label, f'*{benchmark_type}._{row["Method"]}', params, issues))
+    return entries
+
+def print_rerun_list(entries):
+    """Print the flagged benchmarks grouped by BenchmarkDotNet filter"""
+    if not entries:
+        print("\nNo unstable benchmarks detected.")
+        return
+
+    print(f"\n{len(entries)} unstable benchmark result(s), re-run recommended:")
+    for label, filter_glob, params, issues in entries:
+        params_str = f" ({params})" if params else ''
+        print(f"  [{label}] {filter_glob}{params_str}: {', '.join(issues)}")
+
+    print("\nSuggested filters per directory:")
+    for label in dict.fromkeys(label for label, _, _, _ in entries):
+        filters = dict.fromkeys(f for l, f, _, _ in entries if l == label)
+        print(f"  {label}: --filter " + ' '.join(f"'{f}'" for f in filters))
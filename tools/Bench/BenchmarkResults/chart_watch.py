@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import io
+import multiprocessing
+import os
+import time
+import traceback
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import matplotlib.pyplot as plt
+
+
+# A chart task is (function, args, kwargs), executed in a render worker
+ChartTask = Tuple[Callable, tuple, dict]
+
+# A watch target is (source files, loader); the loader parses the sources in the watcher process
+# and returns the chart tasks to render
+WatchTarget = Tuple[Sequence[Path], Callable[[], List[ChartTask]]]
+
+POLL_INTERVAL = 0.2  # seconds
+
+
+def _warm_up() -> None:
+	"""Load the Agg backend and fonts so the first real chart doesn't pay for them."""
+	plt.switch_backend("Agg")
+	fig, ax = plt.subplots(figsize=(2, 1))
+	ax.barh(0, 1, hatch="oo")
+	ax.set_title("warm-up", fontweight="bold")
+	ax.text(0, 0, "warm-up ⚠", fontstyle="italic")
+	fig.savefig(io.BytesIO(), format="svg", bbox_inches="tight")
+	plt.close(fig)
+
+
+def _run_task(task: ChartTask) -> None:
+	func, args, kwargs = task
+	func(*args, **kwargs)
+
+
+def _signature(path: Path) -> Optional[Tuple[int, int]]:
+	try:
+		stat = path.stat()
+	except FileNotFoundError:
+		return None
+	return stat.st_mtime_ns, stat.st_size
+
+
+def watch(
+	targets: Iterable[WatchTarget],
+	on_loaded: Sequence[Callable[[], None]] = (),
+	interval: float = POLL_INTERVAL,
+	workers: Optional[int] = None,
+) -> None:
+	"""Poll the targets' source files and re-render the charts derived from any file that changes.
+
+	A file is picked up once its size and modification time are unchanged for one poll, so reports
+	that are still being written aren't parsed. The on_loaded callbacks run once per batch of changes
+	after the loaders, e.g. to print a combined summary. Charts are rendered in parallel by a pool of
+	warm worker processes.
+	"""
+	targets = list(targets)
+	dependents: Dict[Path, List[int]] = {}
+	for index, (sources, _) in enumerate(targets):
+		for source in sources:
+			dependents.setdefault(Path(source), []).append(index)
+
+	seen = {path: _signature(path) for path in dependents}
+	pending: Dict[Path, Tuple[int, int]] = {}
+
+	_warm_up()
+	workers = workers or os.cpu_count() or 1
+	with multiprocessing.Pool(workers, initializer=_warm_up) as pool:
+		directories = sorted({str(path.parent) for path in dependents})
+		print(f"Watching {', '.join(directories)} with {workers} render worker(s), press Ctrl+C to stop")
+
+		try:
+			while True:
+				time.sleep(interval)
+
+				changed: List[Path] = []
+				for path in dependents:
+					signature = _signature(path)
+					if signature == seen[path]:
+						pending.pop(path, None)
+					elif signature is None:
+						seen[path] = None
+					elif pending.get(path) != signature:
+						pending[path] = signature  # still being written, wait for it to settle
+					else:
+						seen[path] = pending.pop(path)
+						changed.append(path)
+
+				if not changed:
+					continue
+
+				started = time.perf_counter()
+				print(f"\nChanged: {', '.join(str(path) for path in changed)}")
+
+				tasks: List[ChartTask] = []
+				for index in sorted({index for path in changed for index in dependents[path]}):
+					try:
+						tasks += targets[index][1]()
+					except Exception:
+						traceback.print_exc()
+
+				for callback in on_loaded:
+					callback()
+
+				# Wait for every chart so errors are reported before the next poll
+				results = [pool.apply_async(_run_task, (task,)) for task in tasks]
+				for result in results:
+					try:
+						result.get()
+					except Exception:
+						traceback.print_exc()
+
+				print(f"Rendered {len(tasks)} chart(s) in {time.perf_counter() - started:.2f}s")
+		except KeyboardInterrupt:
+			print("\nStopped watching.")
+
+
+def main() -> None:
+	"""Watch the benchmark and enum results in a single process."""
+	# Imported here as both scripts import this module
+	import benchmark_charts
+	import enum_charts
+
+	base_dir = Path(__file__).resolve().parent
+	os.chdir(base_dir)  # benchmark_charts uses paths relative to the results directory
+	benchmark_targets, print_benchmark_rerun_list = benchmark_charts.watch_targets()
+	watch(benchmark_targets + enum_charts.watch_targets(Path("Enums")), [print_benchmark_rerun_list])
+
+
+if __name__ == "__main__":
+	main()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import argparse
 import math
 from pathlib import Path
 from typing import Dict, Iterable, List
@@ -7,6 +8,8 @@ from typing import Dict, Iterable, List
 import matplotlib.pyplot as plt
 import pandas as pd
 
+from chart_watch import ChartTask, WatchTarget, watch
+
 
 # Shared colors across all charts
 METHOD_COLORS: Dict[str, str] = {
@@ -90,6 +93,9 @@ def _create_chart(
 		method: str = getattr(row, "Method")
 		label: str = getattr(row, label_col)
 		hatch: str | None = getattr(row, hatch_col) if hatch_col and hasattr(row, hatch_col) else None
+		# pandas >= 3 infers the str dtype for the "///"/None Hatch column, which stores None as NaN
+		if not isinstance(hatch, str):
+			hatch = None
 		color = _method_color(method)
 		
 		offset = 0
@@ -113,9 +119,9 @@ def _create_chart(
 		spine.set_color(style["text"])
 
 	output_file.parent.mkdir(parents=True, exist_ok=True)
-	plt.tight_layout()
-	plt.savefig(output_file, dpi=300, bbox_inches="tight", facecolor=style["face"])
-	plt.close()
+	fig.tight_layout()
+	fig.savefig(output_file, dpi=300, bbox_inches="tight", facecolor=style["face"])
+	plt.close(fig)
 	print(f"Saved: {output_file}")
 
 
@@ -127,7 +133,8 @@ def _as_bool(value: object) -> bool:
 	return str(value).strip().lower() == "true"
 
 
-def _render_parse_charts(df: pd.DataFrame, out_dir: Path) -> None:
+def _parse_chart_tasks(df: pd.DataFrame, out_dir: Path) -> List[ChartTask]:
+	tasks: List[ChartTask] = []
 	# Group by Bytes + ParseNumbers; keep IgnoreCase variants together in one chart
 	unique_params = df[["Bytes", "ParseNumbers"]].drop_duplicates()
 	for _, param_row in unique_params.iterrows():
@@ -162,27 +169,17 @@ def _render_parse_charts(df: pd.DataFrame, out_dir: Path) -> None:
 		title = f"Parse enum {value_label} from {encoding}"
 		suffix = _slugify([value_label, encoding])
 
-		_create_chart(
-			chart_df,
-			title,
-			"light",
-			out_dir / f"parse_enum_{suffix}_light.svg",
-			label_col="Label",
-			hatch_col="Hatch",
-			sort_rows=False,
-		)
-		_create_chart(
-			chart_df,
-			title,
-			"dark",
-			out_dir / f"parse_enum_{suffix}_dark.svg",
-			label_col="Label",
-			hatch_col="Hatch",
-			sort_rows=False,
-		)
+		for mode in ["light", "dark"]:
+			tasks.append((
+				_create_chart,
+				(chart_df, title, mode, out_dir / f"parse_enum_{suffix}_{mode}.svg"),
+				{"label_col": "Label", "hatch_col": "Hatch", "sort_rows": False},
+			))
+	return tasks
 
 
-def _render_format_charts(df: pd.DataFrame, out_dir: Path) -> None:
+def _format_chart_tasks(df: pd.DataFrame, out_dir: Path) -> List[ChartTask]:
+	tasks: List[ChartTask] = []
 	unique_params = df[["Numeric", "Bytes"]].drop_duplicates()
 	for _, param_row in unique_params.iterrows():
 		subset = df.copy()
@@ -201,19 +198,38 @@ def _render_format_charts(df: pd.DataFrame, out_dir: Path) -> None:
 		title = f"Format enum {value_label} to {encoding}"
 		suffix = _slugify([value_label, encoding])
 
-		_create_chart(subset, title, "light", out_dir / f"format_enum_{suffix}_light.svg")
-		_create_chart(subset, title, "dark", out_dir / f"format_enum_{suffix}_dark.svg")
+		for mode in ["light", "dark"]:
+			tasks.append((_create_chart, (subset, title, mode, out_dir / f"format_enum_{suffix}_{mode}.svg"), {}))
+	return tasks
+
+
+def watch_targets(enum_dir: Path) -> List[WatchTarget]:
+	parse_csv = enum_dir / "Parse.csv"
+	format_csv = enum_dir / "Format.csv"
+	return [
+		([parse_csv], lambda: _parse_chart_tasks(_prepare_dataframe(parse_csv), enum_dir)),
+		([format_csv], lambda: _format_chart_tasks(_prepare_dataframe(format_csv), enum_dir)),
+	]
 
 
 def main() -> None:
+	parser = argparse.ArgumentParser(description="Generate enum parsing and formatting charts")
+	parser.add_argument("--watch", action="store_true", help="keep running and re-render the charts of reports as they change")
+	args = parser.parse_args()
+
 	base_dir = Path(__file__).resolve().parent
 	enum_dir = base_dir / "Enums"
 
+	if args.watch:
+		watch(watch_targets(enum_dir))
+		return
+
 	parse_df = _prepare_dataframe(enum_dir / "Parse.csv")
 	format_df = _prepare_dataframe(enum_dir / "Format.csv")
 
-	_render_parse_charts(parse_df, enum_dir)
-	_render_format_charts(format_df, enum_dir)
+	tasks = _parse_chart_tasks(parse_df, enum_dir) + _format_chart_tasks(format_df, enum_dir)
+	for func, func_args, func_kwargs in tasks:
+		func(*func_args, **func_kwargs)
 
 	print("\nAll enum charts generated successfully!")
 